@@ -1,25 +1,35 @@
 import os
 import logging
+import dask
 import dask.dataframe as dd
 from dask.distributed import Client, LocalCluster
 from dask.diagnostics import ProgressBar
 from tqdm.auto import tqdm
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, Optional, Tuple, Union
 import argparse
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from zipfile import ZipFile
 import concurrent.futures
+import contextlib
 import shutil
+import stat
+import sys
+import threading
 import pickle
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
+# scikit-learn, seaborn and joblib are imported where the analysis uses them (seaborn
+# through _seaborn), so download, processing and cleanup runs do not pay for loading them
 import matplotlib.pyplot as plt
-import seaborn as sns
-import joblib
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pv
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
 import time
 import json
 
@@ -33,24 +43,47 @@ logging.basicConfig(
 CONFIG = {
     'base_url': 'https://opentransportdata.swiss/wp-content/uploads/ist-daten-archive',
     'data_path': 'data',
-    'download_threads': 4,
+    'download_threads': None,  # None sizes the pool from the months to download
     'process_workers': 5,
     'memory_per_worker': 6,  # GB
     'months_history': 11,
-    'chunk_size': 100000,
+    'chunk_size': 64,  # MB per CSV block
     'exclude_columns': ['BETREIBER_ABK','FAHRT_BEZEICHNER','PRODUKT_ID', 'BETREIBER_NAME', 'BETREIBER_ID', 'UMLAUF_ID', 'VERKEHRSMITTEL_TEXT', 'BPUIC', 'BETRIEBSTAG'],
     'filters': {'LINIEN_TEXT': ['IC2', 'IC3', 'IC5', 'IC6', 'IC8', 'IC21', 'IC51', 'IC61', 'IC81']}
 }
 
+# int64 view of NaT in datetime64[ns] arrays
+NAT_NS = np.iinfo(np.int64).min
+
+# Spellings of true in the *_TF columns; anything else, including missing, encodes as 0
+TRUE_VALUES = ['true', 'True', 'TRUE']
+
+def _seaborn():
+    """Return the seaborn module, importing it on first use."""
+    import seaborn
+    return seaborn
+
 class DataDownloader:
     """Handles downloading and extracting of train data files with robust error handling."""
     
-    def __init__(self, base_url: str, target_folder: str, max_retries: int = 3, chunk_size: int = 8192):
+    def __init__(self, base_url: str, target_folder: str, max_retries: int = 3, chunk_size: int = 1 << 20):
         self.base_url = base_url
         self.target_folder = target_folder
         self.max_retries = max_retries
         self.chunk_size = chunk_size
+        self.extract_buffer_size = 1 << 20  # 1 MiB
+        self.max_connections = 16
+        self.extracted_paths = set()
         self.session = requests.Session()
+        # Pool connections for the download threads. The adapter does not retry:
+        # _download_month already retries with backoff and resumes partial files
+        adapter = HTTPAdapter(
+            pool_connections=self.max_connections,
+            pool_maxsize=self.max_connections,
+            max_retries=Retry(total=0)
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         # Configure longer timeouts
         self.session.timeout = (30, 300)  # (connect timeout, read timeout)
         
@@ -121,14 +154,30 @@ class DataDownloader:
             with ZipFile(zip_path) as zip_file:
                 # Get total size for progress bar
                 total_size = sum(info.file_size for info in zip_file.filelist)
-                extracted_size = 0
+                target_root = os.path.realpath(self.target_folder)
+                
+                # One buffer is reused for every member instead of allocating per read
+                buffer = memoryview(bytearray(self.extract_buffer_size))
                 
                 with tqdm(total=total_size, unit='iB', unit_scale=True, 
                          desc=f"Extracting {os.path.basename(zip_path)}") as pbar:
                     for info in zip_file.filelist:
-                        zip_file.extract(info, self.target_folder)
-                        extracted_size += info.file_size
-                        pbar.update(info.file_size)
+                        target = os.path.realpath(os.path.join(target_root, info.filename))
+                        if os.path.commonpath([target_root, target]) != target_root:
+                            raise ValueError(f"Unsafe path in archive: {info.filename}")
+                        if info.is_dir():
+                            os.makedirs(target, exist_ok=True)
+                            continue
+                        
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        self.extracted_paths.add(target)
+                        with zip_file.open(info) as src, open(target, 'wb') as dst:
+                            while True:
+                                size = src.readinto(buffer)
+                                if not size:
+                                    break
+                                dst.write(buffer[:size])
+                                pbar.update(size)
                 
                 return True
         except Exception as e:
@@ -137,68 +186,101 @@ class DataDownloader:
     
     def download_extract(self, month: str) -> bool:
         """Download and extract data with retries."""
-        file_url = f"{self.base_url}/ist-daten-{month}.zip"
-        temp_zip = os.path.join(self.target_folder, f"ist-daten-{month}.zip")
-        
         print(f"\nProcessing {month}...")
         
         for attempt in range(self.max_retries):
-            try:
-                if attempt > 0:
-                    print(f"Retry attempt {attempt + 1}/{self.max_retries}")
-                
-                # Download
-                if not self._download_with_resume(file_url, temp_zip):
-                    continue
-                
-                # Extract
-                if not self._extract_with_progress(temp_zip):
-                    continue
-                
-                # Clean up
-                try:
-                    os.remove(temp_zip)
-                except Exception as e:
-                    print(f"Warning: Could not remove temporary file {temp_zip}: {str(e)}")
-                
+            zip_path = self._download_month(month)
+            if zip_path is None:
+                return False
+            if self._extract_month(month, zip_path):
                 return True
-                
-            except Exception as e:
-                print(f"Error on attempt {attempt + 1}: {str(e)}")
-                if attempt < self.max_retries - 1:
-                    sleep_time = 2 ** attempt  # Exponential backoff
-                    print(f"Waiting {sleep_time} seconds before retry...")
-                    time.sleep(sleep_time)
+            if attempt < self.max_retries - 1:
+                print(f"Downloading {month} again")
         
         print(f"Failed to process {month} after {self.max_retries} attempts")
         return False
     
-    def download_months(self, months: List[str], max_workers: int = 4) -> bool:
+    def _download_month(self, month: str) -> Optional[str]:
+        """Download the archive of one month with retries and return its path."""
+        file_url = f"{self.base_url}/ist-daten-{month}.zip"
+        temp_zip = os.path.join(self.target_folder, f"ist-daten-{month}.zip")
+        
+        for attempt in range(self.max_retries):
+            if attempt > 0:
+                print(f"Retry attempt {attempt + 1}/{self.max_retries} for {month}")
+            if self._download_with_resume(file_url, temp_zip):
+                return temp_zip
+            if attempt < self.max_retries - 1:
+                sleep_time = 2 ** attempt  # Exponential backoff
+                print(f"Waiting {sleep_time} seconds before retry...")
+                time.sleep(sleep_time)
+        
+        print(f"Failed to download {month} after {self.max_retries} attempts")
+        return None
+    
+    def _extract_month(self, month: str, zip_path: str) -> bool:
+        """Extract a downloaded archive, removing it afterwards; a corrupt archive is discarded."""
+        if not self._extract_with_progress(zip_path):
+            print(f"Archive of {month} could not be extracted")
+            try:
+                os.remove(zip_path)
+            except OSError:
+                pass
+            return False
+        
+        try:
+            os.remove(zip_path)
+        except Exception as e:
+            print(f"Warning: Could not remove temporary file {zip_path}: {str(e)}")
+        return True
+    
+    def download_months(self, months: List[str], max_workers: Optional[int] = None) -> bool:
         """Download multiple months with proper resource management."""
         results = []
         failed_months = []
         
+        # Downloads wait on the network, not the CPU, so size the pool by the number
+        # of months, bounded by the connections the session keeps alive
+        if max_workers is None:
+            max_workers = min(len(months), max(4, (os.cpu_count() or 4) * 4), self.max_connections)
+        
         print(f"\n=== Downloading {len(months)} months of data ===")
         print(f"Workers: {max_workers}")
         print(f"Max retries per download: {self.max_retries}")
         
-        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_month = {
-                executor.submit(self.download_extract, month): month 
+        # Downloads and extraction run in separate pools, so a finished archive is
+        # unpacked while the remaining months keep the connections busy. A corrupt
+        # archive goes back to the download pool instead of being re-fetched on the
+        # extract thread, which would hold up every queued extraction
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as download_pool, \
+             concurrent.futures.ThreadPoolExecutor(max_workers=1) as extract_pool:
+            pending = {
+                download_pool.submit(self._download_month, month): ('download', month)
                 for month in months
             }
+            extract_attempts = {}
             
-            for future in concurrent.futures.as_completed(future_to_month):
-                month = future_to_month[future]
-                try:
-                    success = future.result()
-                    results.append(success)
-                    if not success:
+            while pending:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    stage, month = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"Unexpected error processing {month}: {str(e)}")
+                        result = None
+                    
+                    if stage == 'download' and result:
+                        extract_attempts[month] = extract_attempts.get(month, 0) + 1
+                        pending[extract_pool.submit(self._extract_month, month, result)] = ('extract', month)
+                    elif stage == 'extract' and result:
+                        results.append(True)
+                    elif stage == 'extract' and extract_attempts[month] < self.max_retries:
+                        print(f"Downloading {month} again")
+                        pending[download_pool.submit(self._download_month, month)] = ('download', month)
+                    else:
+                        results.append(False)
                         failed_months.append(month)
-                except Exception as e:
-                    print(f"Unexpected error processing {month}: {str(e)}")
-                    results.append(False)
-                    failed_months.append(month)
         
         # Summary
         success_count = sum(results)
@@ -220,22 +302,38 @@ class DataValidation:
         Returns (success, stats_dict)
         """
         try:
-            ddf = dd.read_parquet(file_path)
+            # Row counts and sizes come from the parquet footers without reading data
+            dataset = ds.dataset(file_path, format='parquet')
+            fragments = list(dataset.get_fragments())
+            uncompressed = sum(
+                fragment.metadata.row_group(i).total_byte_size
+                for fragment in fragments
+                for i in range(fragment.metadata.num_row_groups)
+            )
             stats = {
-                'total_rows': int(ddf.shape[0].compute()),
-                'columns': list(ddf.columns),
-                'memory_usage': f"{ddf.memory_usage(deep=True).sum().compute() / (1024**2):.2f} MB",
-                'file_size': f"{os.path.getsize(file_path) / (1024**2):.2f} MB"
+                'total_rows': dataset.count_rows(),
+                'columns': dataset.schema.names,
+                'memory_usage': f"{uncompressed / (1024**2):.2f} MB",
+                'file_size': f"{sum(os.path.getsize(path) for path in dataset.files) / (1024**2):.2f} MB"
             }
             
-            # Get statistics for encoded columns
-            encoded_cols = [col for col in ddf.columns if col.endswith('_encoded')]
+            # Get statistics for encoded columns. Cardinalities recorded at encoding
+            # time in the field metadata are used as is; only the rest are scanned
+            encoded_cols = [col for col in dataset.schema.names if col.endswith('_encoded')]
             stats['encoded_columns'] = {}
+            known = {}
+            for col in encoded_cols:
+                metadata = dataset.schema.field(col).metadata or {}
+                if b'categories' in metadata:
+                    known[col] = len(json.loads(metadata[b'categories']))
+            table = dataset.to_table(columns=[col for col in encoded_cols if col not in known])
             
             for col in encoded_cols:
                 try:
-                    value_counts = ddf[col].value_counts().compute()
-                    unique_values = len(value_counts)
+                    if col in known:
+                        unique_values = known[col]
+                    else:
+                        unique_values = pc.count_distinct(table.column(col)).as_py()
                     stats['encoded_columns'][col] = {
                         'unique_values': unique_values,
                         'value_range': f"0 to {unique_values - 1}"
@@ -248,6 +346,21 @@ class DataValidation:
             logging.error(f"Validation error: {str(e)}")
             return False, {'error': str(e)}
 
+class TargetModel:
+    """Exposes one output of a multi-output regressor with the single-target API."""
+    
+    def __init__(self, model, index: int):
+        self.model = model
+        self.index = index
+    
+    @property
+    def feature_importances_(self):
+        # Importances are shared by all outputs of the forest
+        return self.model.feature_importances_
+    
+    def predict(self, X):
+        return self.model.predict(X)[:, self.index]
+
 class DelayAnalyzer:
     """Advanced train delay analysis using Rainbow Forest approach with Dask."""
     
@@ -268,9 +381,9 @@ class DelayAnalyzer:
                 'min_samples_leaf': 10,
                 'max_features': 'sqrt',
                 'n_jobs': -1,
-                'random_state': 42,
-                'warm_start': True
+                'random_state': 42
             },
+            'max_training_rows': None,  # set to cap the rows sampled for the models
             'tuning_grid': {
                 'n_estimators': [100, 200, 300],
                 'max_depth': [10, 20, None],
@@ -283,12 +396,16 @@ class DelayAnalyzer:
         self.feature_cols = None
         self.geo_cols = ['STATION_LAT', 'STATION_LON']
 
-    def analyze_station_delays(self, df):
-        """Analyze delays by station."""
-        station_stats = df.groupby('HALTESTELLEN_NAME_encoded').agg({
+    def aggregate_station_delays(self, df):
+        """Aggregate delays by station; lazy when given a Dask DataFrame."""
+        return df.groupby('HALTESTELLEN_NAME_encoded').agg({
             'ARRIVAL_TIME_DIFF_SECONDS': ['count', 'mean', 'std'],
             'DEPARTURE_TIME_DIFF_SECONDS': ['count', 'mean', 'std']
-        }).compute()
+        })
+
+    def analyze_station_delays(self, station_stats):
+        """Label the computed per-station delay aggregates."""
+        station_stats = station_stats.copy()
         
         # Flatten column names
         station_stats.columns = [f'{col[0]}_{col[1]}'.lower() for col in station_stats.columns]
@@ -299,11 +416,8 @@ class DelayAnalyzer:
         
         return station_stats
     
-    def plot_station_delays(self, df):
+    def plot_station_delays(self, station_stats):
         """Create comprehensive visualizations for station-based delays."""
-        print("\nAnalyzing station delays...")
-        station_stats = self.analyze_station_delays(df)
-        
         # Create figure with better size and spacing
         fig = plt.figure(figsize=(20, 12))
         gs = plt.GridSpec(2, 2, height_ratios=[1.2, 1], hspace=0.3, wspace=0.25)
@@ -472,18 +586,16 @@ class DelayAnalyzer:
 
     def calculate_advanced_statistics(self, ddf):
         """Calculate comprehensive delay statistics with time patterns."""
-        stats = {}
+        aggs = {}
     
         # Basic statistics
         for col in ['ARRIVAL_TIME_DIFF_SECONDS', 'DEPARTURE_TIME_DIFF_SECONDS']:
-            stats[col] = {
-                'mean': ddf[col].mean().compute(),
-                'median': ddf[col].quantile(0.5).compute(),
-                'std': ddf[col].std().compute(),
-                'skew': ddf[col].skew().compute(),
-                'kurtosis': ddf[col].kurtosis().compute(),
-                'q90': ddf[col].quantile(0.9).compute(),
-                'q95': ddf[col].quantile(0.95).compute()
+            aggs[col] = {
+                'mean': ddf[col].mean(),
+                'quantiles': ddf[col].quantile([0.5, 0.9, 0.95]),
+                'std': ddf[col].std(),
+                'skew': ddf[col].skew(),
+                'kurtosis': ddf[col].kurtosis()
             }
     
         # Time patterns
@@ -491,7 +603,17 @@ class DelayAnalyzer:
             if time_col in ddf.columns:
                 # Group by minutes and calculate mean delays
                 delay_col = 'ARRIVAL_TIME_DIFF_SECONDS' if 'ANKUNFT' in time_col else 'DEPARTURE_TIME_DIFF_SECONDS'
-                stats[time_col] = ddf.groupby(time_col)[delay_col].mean().compute()
+                aggs[time_col] = ddf.groupby(time_col)[delay_col].mean()
+    
+        # Station aggregates over all rows, so modeling can work on a sample
+        if 'HALTESTELLEN_NAME_encoded' in ddf.columns:
+            aggs['stations'] = self.aggregate_station_delays(ddf)
+    
+        # Evaluate everything in one graph so shared column reads are done once
+        stats, = dask.compute(aggs)
+        for col in ['ARRIVAL_TIME_DIFF_SECONDS', 'DEPARTURE_TIME_DIFF_SECONDS']:
+            quantiles = stats[col].pop('quantiles')
+            stats[col].update({'median': quantiles[0.5], 'q90': quantiles[0.9], 'q95': quantiles[0.95]})
     
         return stats
 
@@ -516,8 +638,12 @@ class DelayAnalyzer:
     
         # Plot 1: Overall distribution
         plt.subplot(2, 2, 1)
-        sns.kdeplot(data=df, x=df['DEPARTURE_TIME_DIFF_SECONDS'].div(60), label='Departure', alpha=0.5)
-        sns.kdeplot(data=df, x=df['ARRIVAL_TIME_DIFF_SECONDS'].div(60), label='Arrival', alpha=0.5)
+        # Binned densities are linear in the row count, unlike a KDE
+        bins = np.linspace(-10, 30, 201)
+        plt.hist(df['DEPARTURE_TIME_DIFF_SECONDS'].to_numpy() / 60, bins=bins, density=True,
+                 histtype='step', label='Departure', alpha=0.5)
+        plt.hist(df['ARRIVAL_TIME_DIFF_SECONDS'].to_numpy() / 60, bins=bins, density=True,
+                 histtype='step', label='Arrival', alpha=0.5)
         plt.xlabel('Delay (minutes)')
         plt.ylabel('Density')
         plt.title('Distribution of Delays')
@@ -527,6 +653,7 @@ class DelayAnalyzer:
 
     def plot_time_patterns(self, stats):
         """Create enhanced time-based pattern visualizations."""
+        sns = _seaborn()
         fig = plt.figure(figsize=(15, 10))
         
         # Setup subplots
@@ -670,10 +797,18 @@ class DelayAnalyzer:
         """Create model performance visualizations."""
         fig = plt.figure(figsize=(15, 10))
         
-        for i, (name, model) in enumerate(models.items(), 1):
+        # A scatter of 20k points shows the same spread as the full set at a
+        # fraction of the drawing time
+        max_points = 20_000
+        if len(df) > max_points:
+            rng = np.random.default_rng(42)
+            df = df.iloc[rng.choice(len(df), size=max_points, replace=False)]
+        
+        predictions = self.predict_targets(df, models)
+        for i, name in enumerate(models, 1):
             plt.subplot(1, 2, i)
             y_true = df[f'{name.upper()}_TIME_DIFF_SECONDS']
-            y_pred = model.predict(df[self.feature_cols])
+            y_pred = predictions[name]
             
             plt.scatter(y_true/60, y_pred/60, alpha=0.5)
             plt.plot([-60, 60], [-60, 60], 'r--')
@@ -683,8 +818,30 @@ class DelayAnalyzer:
             
         return fig
 
+    def predict_targets(self, df, models):
+        """Predict every target, running each shared forest once."""
+        outputs = {}
+        predictions = {}
+        for name, model in models.items():
+            if id(model.model) not in outputs:
+                outputs[id(model.model)] = model.model.predict(df[self.feature_cols])
+            predictions[name] = outputs[id(model.model)][:, model.index]
+        return predictions
+
+    def shared_importances(self, models):
+        """Return the feature importances of the forest shared by all targets."""
+        model = next(iter(models.values()))
+        return pd.DataFrame({
+            'feature': self.feature_cols,
+            'importance': model.feature_importances_
+        }).sort_values('importance', ascending=False)
+
     def train_models(self, df):
         """Train delay prediction models with proper error handling."""
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import mean_squared_error, r2_score
+        
         try:
             # Update feature columns to include geospatial features
             if not self.feature_cols:
@@ -696,9 +853,11 @@ class DelayAnalyzer:
             for col in sorted(self.feature_cols):
                 print(f"- {col}")
             
-            X = df[self.feature_cols]
-            y_dep = df['DEPARTURE_TIME_DIFF_SECONDS']
-            y_arr = df['ARRIVAL_TIME_DIFF_SECONDS']
+            # The tree fitters work on float32 features and float64 targets; converting
+            # once here avoids a cast of the full matrix inside fit
+            X = df[self.feature_cols].astype(np.float32)
+            targets = ['departure', 'arrival']
+            y = df[[f'{name.upper()}_TIME_DIFF_SECONDS' for name in targets]].to_numpy(dtype=np.float64)
         
             # Verify data
             if X.isna().any().any():
@@ -713,50 +872,46 @@ class DelayAnalyzer:
                         X[col] = X[col].fillna(0)
         
             # Split data
-            X_train, X_test, y_train_dep, y_test_dep, y_train_arr, y_test_arr = train_test_split(
-                X, y_dep, y_arr, test_size=0.2, random_state=42
+            X_train, X_test, y_train, y_test = train_test_split(
+                X, y, test_size=0.2, random_state=42
             )
         
+            # Both delays are fitted by one multi-output forest: the split search over
+            # the shared features is done once instead of once per target
+            print("\nTraining delay model...")
+            model = RandomForestRegressor(**self.model_params['base'])
+        
+            # Handle potential memory issues
+            try:
+                model.fit(X_train, y_train)
+            except MemoryError:
+                logging.warning("Memory error during training. Reducing estimators for delay model...")
+                model = RandomForestRegressor(
+                    **{**self.model_params['base'], 
+                       'n_estimators': self.model_params['base']['n_estimators'] // 2}
+                )
+                model.fit(X_train, y_train)
+        
+            y_pred = model.predict(X_test)
+        
             models = {}
-            feature_importance_data = {}
-            
-            for name, (y_train, y_test) in [('departure', (y_train_dep, y_test_dep)), 
-                                           ('arrival', (y_train_arr, y_test_arr))]:
-                print(f"\nTraining {name} model...")
-                model = RandomForestRegressor(**self.model_params['base'])
-            
-                # Handle potential memory issues
-                try:
-                    model.fit(X_train, y_train)
-                except MemoryError:
-                    logging.warning(f"Memory error during training. Reducing estimators for {name} model...")
-                    model = RandomForestRegressor(
-                        **{**self.model_params['base'], 
-                           'n_estimators': self.model_params['base']['n_estimators'] // 2}
-                    )
-                    model.fit(X_train, y_train)
             
+            for index, name in enumerate(targets):
                 # Evaluate
-                y_pred = model.predict(X_test)
-                print(f"{name.title()} Model Performance:")
-                print(f"R² Score: {r2_score(y_test, y_pred):.3f}")
-                print(f"RMSE: {np.sqrt(mean_squared_error(y_test, y_pred))/60:.2f} minutes")
-                
-                # Calculate and store feature importances
-                importances = pd.DataFrame({
-                    'feature': self.feature_cols,
-                    'importance': model.feature_importances_
-                }).sort_values('importance', ascending=False)
-                
-                print(f"\nTop 10 most important features for {name} delays:")
-                for _, row in importances.head(10).iterrows():
-                    print(f"- {row['feature']}: {row['importance']:.4f}")
+                print(f"\n{name.title()} Model Performance:")
+                print(f"R² Score: {r2_score(y_test[:, index], y_pred[:, index]):.3f}")
+                print(f"RMSE: {np.sqrt(mean_squared_error(y_test[:, index], y_pred[:, index]))/60:.2f} minutes")
                 
-                models[name] = model
-                feature_importance_data[name] = importances
+                models[name] = TargetModel(model, index)
+            
+            # The forest has one set of importances for both targets
+            importances = self.shared_importances(models)
+            print("\nTop 10 most important features (shared by departure and arrival delays):")
+            for _, row in importances.head(10).iterrows():
+                print(f"- {row['feature']}: {row['importance']:.4f}")
             
             # Save feature importance plots
-            self._save_feature_importance_plots(feature_importance_data)
+            self._save_feature_importance_plots(importances)
             
             return models
         
@@ -764,76 +919,72 @@ class DelayAnalyzer:
             logging.error(f"Error in model training: {str(e)}")
             raise
 
-    def _save_feature_importance_plots(self, feature_importance_data):
+    def _save_feature_importance_plots(self, importances):
         """Save detailed feature importance visualizations."""
+        sns = _seaborn()
         try:
             # Create plots directory
             plots_dir = os.path.join(self.processed_folder, 'plots')
             os.makedirs(plots_dir, exist_ok=True)
             
-            for model_name, importances in feature_importance_data.items():
-                plt.figure(figsize=(12, 8))
-                
-                # Plot feature importances
-                sns.barplot(data=importances.head(15), x='importance', y='feature')
-                plt.title(f'Top 15 Features for {model_name.title()} Delay Prediction')
-                plt.xlabel('Feature Importance')
-                plt.ylabel('Feature')
-                
-                # Add value labels
-                for i, v in enumerate(importances.head(15)['importance']):
-                    plt.text(v, i, f'{v:.4f}', va='center')
-                
-                # Save plot
-                plt.tight_layout()
-                plt.savefig(os.path.join(plots_dir, f'feature_importance_{model_name}.png'))
-                plt.close()
-                
-                # Save detailed feature importance data
-                importances.to_csv(os.path.join(plots_dir, f'feature_importance_{model_name}.csv'))
+            plt.figure(figsize=(12, 8))
+            
+            # Plot feature importances
+            sns.barplot(data=importances.head(15), x='importance', y='feature')
+            plt.title('Top 15 Features for Delay Prediction (shared by departure and arrival)')
+            plt.xlabel('Feature Importance')
+            plt.ylabel('Feature')
+            
+            # Add value labels
+            for i, v in enumerate(importances.head(15)['importance']):
+                plt.text(v, i, f'{v:.4f}', va='center')
+            
+            # Save plot
+            plt.tight_layout()
+            plt.savefig(os.path.join(plots_dir, 'feature_importance_delays.png'))
+            plt.close()
+            
+            # Save detailed feature importance data
+            importances.to_csv(os.path.join(plots_dir, 'feature_importance_delays.csv'))
                 
         except Exception as e:
             logging.error(f"Error saving feature importance plots: {str(e)}")
 
     def analyze_geo_importance(self, df, models):
         """Analyze the importance of geographical features."""
+        sns = _seaborn()
         print("\n=== Geographical Feature Analysis ===")
         
         try:
-            for name, model in models.items():
-                print(f"\n{name.title()} Model Geographical Analysis:")
-                
-                # Get feature importances
-                importances = pd.DataFrame({
-                    'feature': self.feature_cols,
-                    'importance': model.feature_importances_
-                })
+            # Departure and arrival share one forest, so there is one set of importances
+            print("\nDelay Model Geographical Analysis (departure and arrival):")
+            importances = self.shared_importances(models)
+            
+            # Filter for geographical features
+            geo_importances = importances[importances['feature'].isin(self.geo_cols)]
+            
+            if not geo_importances.empty:
+                print("\nGeographical Feature Importances:")
+                for _, row in geo_importances.iterrows():
+                    print(f"- {row['feature']}: {row['importance']:.4f}")
                 
-                # Filter for geographical features
-                geo_importances = importances[importances['feature'].isin(self.geo_cols)]
+                # Calculate total geographical impact
+                total_geo_importance = geo_importances['importance'].sum()
+                print(f"\nTotal geographical feature importance: {total_geo_importance:.4f}")
+                print(f"Percentage of model decisions: {total_geo_importance * 100:.2f}%")
                 
-                if not geo_importances.empty:
-                    print("\nGeographical Feature Importances:")
-                    for _, row in geo_importances.iterrows():
-                        print(f"- {row['feature']}: {row['importance']:.4f}")
-                    
-                    # Calculate total geographical impact
-                    total_geo_importance = geo_importances['importance'].sum()
-                    print(f"\nTotal geographical feature importance: {total_geo_importance:.4f}")
-                    print(f"Percentage of model decisions: {total_geo_importance * 100:.2f}%")
-                    
-                    # Create geographical importance visualization
-                    plt.figure(figsize=(10, 6))
-                    sns.barplot(data=geo_importances, x='feature', y='importance')
-                    plt.title(f'Geographical Feature Importance - {name.title()} Model')
-                    plt.xticks(rotation=45)
-                    plt.tight_layout()
-                    
-                    # Save plot
-                    plots_dir = os.path.join(self.processed_folder, 'plots')
-                    plt.savefig(os.path.join(plots_dir, f'geo_importance_{name}.png'))
-                    plt.close()
+                # Create geographical importance visualization
+                plt.figure(figsize=(10, 6))
+                sns.barplot(data=geo_importances, x='feature', y='importance')
+                plt.title('Geographical Feature Importance - Delay Model (departure and arrival)')
+                plt.xticks(rotation=45)
+                plt.tight_layout()
                 
+                # Save plot
+                plots_dir = os.path.join(self.processed_folder, 'plots')
+                plt.savefig(os.path.join(plots_dir, 'geo_importance_delays.png'))
+                plt.close()
+            
         except Exception as e:
             logging.error(f"Error in geographical analysis: {str(e)}")
 
@@ -841,30 +992,18 @@ class DelayAnalyzer:
         """Create feature importance visualizations."""
         fig = plt.figure(figsize=(15, 10))
         
-        # Calculate average feature importance across models
-        all_importances = []
-        for name, model in models.items():
-            importances = pd.DataFrame({
-                'feature': self.feature_cols,
-                'importance': model.feature_importances_,
-                'model': name
-            })
-            all_importances.append(importances)
-        
-        combined_importances = pd.concat(all_importances)
-        
-        # Calculate average importance
-        avg_importances = combined_importances.groupby('feature')['importance'].mean().sort_values(ascending=True)
+        # Departure and arrival share one forest, so there is one set of importances
+        importances = self.shared_importances(models)
         
         # Get top 15 features
-        top_features = avg_importances.tail(15)
+        top_features = importances.head(15).iloc[::-1]
         
         # Create main importance plot
-        ax1 = plt.subplot(2, 1, 1)
-        bars = ax1.barh(range(len(top_features)), top_features.values)
+        ax1 = plt.subplot(1, 1, 1)
+        bars = ax1.barh(range(len(top_features)), top_features['importance'].values)
         ax1.set_yticks(range(len(top_features)))
-        ax1.set_yticklabels(top_features.index)
-        ax1.set_title('Top 15 Most Important Features (Average)')
+        ax1.set_yticklabels(top_features['feature'])
+        ax1.set_title('Top 15 Most Important Features (shared by departure and arrival)')
         ax1.set_xlabel('Feature Importance')
         
         # Add value labels
@@ -873,28 +1012,6 @@ class DelayAnalyzer:
             ax1.text(width, i, f'{width:.4f}', 
                     va='center', fontsize=8)
         
-        # Create comparison plot
-        ax2 = plt.subplot(2, 1, 2)
-        
-        # Get top 10 features for comparison
-        top_10_features = avg_importances.tail(10).index
-        comparison_data = combined_importances[
-            combined_importances['feature'].isin(top_10_features)
-        ]
-        
-        # Create grouped bar plot
-        sns.barplot(
-            data=comparison_data,
-            y='feature',
-            x='importance',
-            hue='model',
-            ax=ax2
-        )
-        
-        ax2.set_title('Top 10 Feature Importance by Model')
-        ax2.set_xlabel('Feature Importance')
-        ax2.set_ylabel('Feature')
-        
         # Add feature categories explanation
         feature_categories = {
             '_encoded': 'Categorical features (stations, lines, etc.)',
@@ -922,16 +1039,9 @@ class DelayAnalyzer:
         
         # Add analysis summary
         summary_text = "Key Findings:\n"
-        for name, model in models.items():
-            # Get top 3 features for this model
-            top_3 = pd.Series(
-                model.feature_importances_,
-                index=self.feature_cols
-            ).nlargest(3)
-            
-            summary_text += f"\n{name.title()} model top features:\n"
-            for feat, imp in top_3.items():
-                summary_text += f"  • {feat}: {imp:.4f}\n"
+        summary_text += "\nDelay model top features:\n"
+        for _, row in importances.head(3).iterrows():
+            summary_text += f"  • {row['feature']}: {row['importance']:.4f}\n"
         
         plt.figtext(0.98, 0.02, summary_text,
                     bbox=dict(facecolor='white', alpha=0.8),
@@ -940,15 +1050,36 @@ class DelayAnalyzer:
         
         return fig
 
-    def analyze_delays(self, parquet_file: str):
+    @staticmethod
+    def open_dataset(path: str) -> ds.Dataset:
+        """Open the processed parquet memory-mapped, with coalesced column chunk reads."""
+        return ds.dataset(
+            path,
+            format=ds.ParquetFileFormat(
+                default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True)
+            ),
+            filesystem=pafs.LocalFileSystem(use_mmap=True)
+        )
+
+    def analyze_delays(self, parquet_file: Union[str, ds.Dataset]):
         """Main analysis method with proper resource cleanup."""
+        import joblib
+        from sklearn.metrics import mean_squared_error, r2_score
+        
         try:
             self.initialize_cluster()
             print("\n=== Starting Enhanced Delay Analysis ===")
     
+            # Discover the files once (or take the caller's dataset); the row count,
+            # the Dask read and the model scan all reuse them
+            dataset = parquet_file
+            if not isinstance(dataset, ds.Dataset):
+                dataset = self.open_dataset(dataset)
+            total_rows = dataset.count_rows()
+    
             # Load data
             print("Loading data...")
-            ddf = dd.read_parquet(parquet_file)
+            ddf = dd.read_parquet(dataset.files)
     
             # Verify required columns
             required_cols = ['DEPARTURE_TIME_DIFF_SECONDS', 'ARRIVAL_TIME_DIFF_SECONDS']
@@ -986,10 +1117,30 @@ class DelayAnalyzer:
             for col in sorted(self.feature_cols):
                 print(f"- {col}")
         
-            # Convert to pandas for modeling
+            # Scan only the model columns and the rows that have both targets; the
+            # filter is pushed into the scan so row groups without them are skipped
+            keep = list(dict.fromkeys(self.feature_cols + required_cols))
+            has_targets = ds.field(required_cols[0]).is_valid() & ds.field(required_cols[1]).is_valid()
+            scanner = dataset.scanner(columns=keep, filter=has_targets, use_threads=True, batch_size=65536)
+        
+            # Models train on every row unless a cap is configured; a capped run samples
+            # each batch as it streams in. The count came from the parquet footers, so
+            # no data was scanned for it
+            max_rows = self.model_params['max_training_rows']
+            fraction = 1.0
+            if max_rows is not None and total_rows > max_rows:
+                fraction = max_rows / total_rows
+            if fraction < 1.0:
+                print(f"\nSampling {max_rows:,} of {total_rows:,} rows for modeling...")
+            rng = np.random.default_rng(42)
+        
             print("\nConverting to pandas DataFrame...")
-            with ProgressBar():
-                df = ddf.compute()
+            batches = []
+            for batch in scanner.to_batches():
+                if fraction < 1.0:
+                    batch = batch.filter(pa.array(rng.random(batch.num_rows) < fraction))
+                batches.append(batch)
+            df = pa.Table.from_batches(batches, schema=scanner.projected_schema).to_pandas()
         
             # Train models
             print("\nTraining models...")
@@ -1009,10 +1160,11 @@ class DelayAnalyzer:
                 'model_performance': self.plot_model_performance(df, models)
             }
 
-            # Add station delay analysis
+            # Add station delay analysis; aggregated over all rows together with the
+            # other statistics, so sampling for the models costs no extra scan
             print("\nAnalyzing station delays...")
-            station_fig = self.plot_station_delays(ddf)
-            figures['station_delays'] = station_fig
+            station_stats = self.analyze_station_delays(stats['stations'])
+            figures['station_delays'] = self.plot_station_delays(station_stats)
         
             # Create plots directory
             plots_dir = os.path.join(self.processed_folder, 'plots')
@@ -1027,29 +1179,24 @@ class DelayAnalyzer:
                 print(f"Saved {name} plot to: {fig_path}")
         
             # Save station statistics
-            station_stats = self.analyze_station_delays(ddf)
             stats_path = os.path.join(self.processed_folder, 'station_stats.csv')
             station_stats.to_csv(stats_path)
             print(f"Saved station statistics to: {stats_path}")
 
-            # Save models
+            # Save models; each file holds the shared forest wrapped to predict its
+            # own target, so loaders keep the single-target predict API
             print("\nSaving models...")
             for name, model in models.items():
                 model_path = os.path.join(self.processed_folder, f'rf_{name}.joblib')
                 joblib.dump(model, model_path)
                 print(f"Saved {name} model to: {model_path}")
         
-            # Save feature importance data
+            # Save feature importance data, shared by both targets
             print("\nSaving feature importance data...")
-            for name, model in models.items():
-                importances = pd.DataFrame({
-                    'feature': self.feature_cols,
-                    'importance': model.feature_importances_
-                }).sort_values('importance', ascending=False)
-            
-                importance_path = os.path.join(self.processed_folder, f'feature_importance_{name}.csv')
-                importances.to_csv(importance_path, index=False)
-                print(f"Saved {name} feature importance to: {importance_path}")
+            importances = self.shared_importances(models)
+            importance_path = os.path.join(self.processed_folder, 'feature_importance_delays.csv')
+            importances.to_csv(importance_path, index=False)
+            print(f"Saved shared feature importance to: {importance_path}")
         
             # Save analysis summary
             summary = {
@@ -1057,20 +1204,22 @@ class DelayAnalyzer:
                 'features_used': self.feature_cols,
                 'has_geo_features': has_geo,
                 'model_params': self.model_params['base'],
-                'performance': {}
+                'performance': {},
+                # One forest predicts both targets, so they share the importances
+                'feature_importance': {
+                    row['feature']: float(row['importance'])
+                    for _, row in importances.iterrows()
+                }
             }
         
-            for name, model in models.items():
+            predictions = self.predict_targets(df, models)
+            for name in models:
                 y_true = df[f'{name.upper()}_TIME_DIFF_SECONDS']
-                y_pred = model.predict(df[self.feature_cols])
+                y_pred = predictions[name]
             
                 summary['performance'][name] = {
                     'r2_score': float(r2_score(y_true, y_pred)),
-                    'rmse_minutes': float(np.sqrt(mean_squared_error(y_true, y_pred))/60),
-                    'feature_importance': {
-                        feat: float(imp) 
-                        for feat, imp in zip(self.feature_cols, model.feature_importances_)
-                    }
+                    'rmse_minutes': float(np.sqrt(mean_squared_error(y_true, y_pred))/60)
                 }
         
             summary_path = os.path.join(self.processed_folder, 'analysis_summary.json')
@@ -1099,49 +1248,138 @@ class DelayAnalyzer:
             import gc
             gc.collect()
 
+class FilteredCSVReader:
+    """Streams one CSV file through Arrow, keeping only the rows that pass all filters.
+
+    Follows Dask's DataFrameIOFunction protocol, so selecting columns from the
+    resulting frame also narrows the columns Arrow has to convert.
+    """
+    
+    def __init__(self, delimiter: str, column_types: Dict, row_filters: Dict,
+                 columns: List[str], block_size: int):
+        self.delimiter = delimiter
+        self.column_types = column_types
+        self.row_filters = row_filters
+        self._columns = list(columns)
+        self.block_size = block_size
+
+    @property
+    def columns(self):
+        return self._columns
+
+    def project_columns(self, columns):
+        """Return a reader producing only the given columns."""
+        if list(columns) == self._columns:
+            return self
+        return FilteredCSVReader(self.delimiter, self.column_types, self.row_filters,
+                                 columns, self.block_size)
+
+    def __call__(self, path: str):
+        # Filter columns are parsed even when they are not part of the output
+        include = self._columns + [col for col in self.row_filters if col not in self._columns]
+        reader = pv.open_csv(
+            path,
+            read_options=pv.ReadOptions(block_size=self.block_size),
+            parse_options=pv.ParseOptions(delimiter=self.delimiter),
+            convert_options=pv.ConvertOptions(
+                column_types={col: self.column_types[col] for col in include},
+                include_columns=include,
+                include_missing_columns=True,
+                strings_can_be_null=True
+            )
+        )
+
+        batches = []
+        for batch in reader:
+            mask = None
+            for column, values in self.row_filters.items():
+                array = batch.column(column)
+                if pa.types.is_dictionary(array.type):
+                    # Test the few dictionary values once, then expand through the indices
+                    condition = pc.take(pc.is_in(array.dictionary, value_set=pa.array(values)), array.indices)
+                else:
+                    condition = pc.is_in(array, value_set=pa.array(values))
+                mask = condition if mask is None else pc.and_(mask, condition)
+            batches.append(batch.filter(mask) if mask is not None else batch)
+
+        table = pa.Table.from_batches(batches, schema=reader.schema).select(self._columns)
+        return DataProcessor._arrow_to_pandas(table)
+
 class DataProcessor:
     """Handles data processing using Dask for distributed computing."""
     
     def __init__(self, n_workers: int = 4, memory_per_worker: int = 7):
         self.n_workers = n_workers
         self.memory_per_worker = memory_per_worker
-        self.cluster = None
-        self.client = None
         self.encoding_maps = {}
+        self.encoded_dtypes = {}
         self.output_file_path = None
         self.geospatial_data = {}
+        self.scheduler = {}
         
         self.bool_columns = ['ZUSATZFAHRT_TF', 'FAELLT_AUS_TF', 'DURCHFAHRT_TF']
+        self.parquet_options = {
+            'compression': 'zstd',
+            'compression_level': 1,
+            'use_dictionary': True,
+            'write_statistics': True,
+            'data_page_version': '2.0',
+            'write_batch_size': 8192,  # rows encoded per call into the column writers
+            'data_page_size': 1 << 20
+        }
+        self.row_group_size = 256 * 1024  # rows
+        # Rows are ordered by operating date and time of day within each file so
+        # row-group statistics can prune and the dictionary/RLE pages see long runs
+        self.sort_columns = ['ANKUNFTSZEIT_DATE', 'ANKUNFTSZEIT_MINUTES']
+        # Fixed layouts of the feed: planned times carry no seconds, forecasts do.
+        # Values that do not match are re-parsed with pandas
+        self.timestamp_formats = {
+            'ANKUNFTSZEIT': '%d.%m.%Y %H:%M',
+            'ABFAHRTSZEIT': '%d.%m.%Y %H:%M',
+            'AN_PROGNOSE': '%d.%m.%Y %H:%M:%S',
+            'AB_PROGNOSE': '%d.%m.%Y %H:%M:%S'
+        }
         self.categorical_columns = [
             'LINIEN_ID', 
             'LINIEN_TEXT',
             'HALTESTELLEN_NAME'
         ]
         
+        # Arrow types used when parsing the CSV columns; low-cardinality columns are
+        # dictionary-encoded while parsing and arrive in pandas as categoricals
+        category = pa.dictionary(pa.int32(), pa.string())
         self.dtype_definitions = {
-            'BETRIEBSTAG': 'object',
-            'FAHRT_BEZEICHNER': 'object',
-            'BETREIBER_ID': 'object',
-            'BETREIBER_ABK': 'object',
-            'BETREIBER_NAME': 'object',
-            'PRODUKT_ID': 'object',
-            'LINIEN_ID': 'object',
-            'LINIEN_TEXT': 'object',
-            'UMLAUF_ID': 'object',
-            'VERKEHRSMITTEL_TEXT': 'object',
-            'ZUSATZFAHRT_TF': 'object',
-            'FAELLT_AUS_TF': 'object',
-            'BPUIC': 'object',
-            'HALTESTELLEN_NAME': 'object',
-            'ANKUNFTSZEIT': 'object',
-            'AN_PROGNOSE': 'object',
-            'AN_PROGNOSE_STATUS': 'object',
-            'ABFAHRTSZEIT': 'object',
-            'AB_PROGNOSE': 'object',
-            'AB_PROGNOSE_STATUS': 'object',
-            'DURCHFAHRT_TF': 'object'
+            'BETRIEBSTAG': pa.string(),
+            'FAHRT_BEZEICHNER': pa.string(),
+            'BETREIBER_ID': category,
+            'BETREIBER_ABK': category,
+            'BETREIBER_NAME': category,
+            'PRODUKT_ID': category,
+            'LINIEN_ID': category,
+            'LINIEN_TEXT': category,
+            'UMLAUF_ID': pa.string(),
+            'VERKEHRSMITTEL_TEXT': category,
+            'ZUSATZFAHRT_TF': category,
+            'FAELLT_AUS_TF': category,
+            'BPUIC': pa.string(),
+            'HALTESTELLEN_NAME': category,
+            'ANKUNFTSZEIT': pa.string(),
+            'AN_PROGNOSE': pa.string(),
+            'AN_PROGNOSE_STATUS': category,
+            'ABFAHRTSZEIT': pa.string(),
+            'AB_PROGNOSE': pa.string(),
+            'AB_PROGNOSE_STATUS': category,
+            'DURCHFAHRT_TF': category
         }
 
+    def set_compression(self, compression: str) -> None:
+        """Select the parquet codec; zstd and gzip are written at level 1."""
+        self.parquet_options['compression'] = compression
+        if compression in ('zstd', 'gzip'):
+            self.parquet_options['compression_level'] = 1
+        else:
+            self.parquet_options.pop('compression_level', None)
+
     def load_geospatial_data(self, geospatial_file: str) -> None:
         """Load geospatial data from the provided file."""
         try:
@@ -1170,156 +1408,243 @@ class DataProcessor:
             logging.error(f"Error loading geospatial data: {str(e)}")
             raise
 
-    def _add_geospatial_columns(self, ddf):
-        """Add geospatial information to the dataframe."""
+    def _build_geospatial_lookup(self, stations):
+        """Build coordinate arrays indexed by station code for the encoded stations."""
         print("\n=== Adding Geospatial Information ===")
     
         if not self.geospatial_data:
             print("Warning: No geospatial data loaded")
-            return ddf
+            return None
     
         try:
-            # Create mappings for station names to coordinates
-            station_to_lat = {}
-            station_to_lon = {}
-            station_to_geoid = {}
-        
-            # Get unique station names from the data
-            unique_stations = ddf['HALTESTELLEN_NAME'].unique().compute()
+            # The last slot holds the fallback, so code -1 (unknown station) picks it up
+            latitudes = np.full(len(stations) + 1, -999.0)
+            longitudes = np.full(len(stations) + 1, -999.0)
+            geoids = np.full(len(stations) + 1, -1, dtype='int64')
         
             # Match station names with geospatial data
             matches = 0
-            for station in unique_stations:
+            for code, station in enumerate(stations):
                 if station in self.geospatial_data:
                     geo_info = self.geospatial_data[station]
-                    station_to_lat[station] = float(geo_info['latitude'])
-                    station_to_lon[station] = float(geo_info['longitude'])
-                    station_to_geoid[station] = int(geo_info['geonameid'])
+                    latitudes[code] = float(geo_info['latitude'])
+                    longitudes[code] = float(geo_info['longitude'])
+                    geoids[code] = int(geo_info['geonameid'])
                     matches += 1
         
             print(f"Matched {matches} stations with geospatial data")
-        
-            # Add new columns using map operation with explicit dtypes and meta
-            print("Adding geospatial columns...")
-            ddf['STATION_LAT'] = ddf['HALTESTELLEN_NAME'].map(
-                station_to_lat,
-                meta=('STATION_LAT', 'float64')
-            ).fillna(-999.0).astype('float64')
-        
-            ddf['STATION_LON'] = ddf['HALTESTELLEN_NAME'].map(
-                station_to_lon,
-                meta=('STATION_LON', 'float64')
-            ).fillna(-999.0).astype('float64')
-        
-            ddf['STATION_GEOID'] = ddf['HALTESTELLEN_NAME'].map(
-                station_to_geoid,
-                meta=('STATION_GEOID', 'int64')
-            ).fillna(-1).astype('int64')
-        
-            # Verify the data types
-            print("\nVerifying geospatial column data types...")
-            for col, dtype in {
-                'STATION_LAT': 'float64',
-                'STATION_LON': 'float64',
-                'STATION_GEOID': 'int64'
-            }.items():
-                actual_dtype = ddf[col].dtype
-                print(f"{col}: {actual_dtype}")
-                if str(actual_dtype) != dtype:
-                    print(f"Warning: {col} has dtype {actual_dtype}, expected {dtype}")
-                    ddf[col] = ddf[col].astype(dtype)
-        
-            print("Geospatial columns added successfully")
-            return ddf
+            return latitudes, longitudes, geoids
         
         except Exception as e:
             logging.error(f"Error adding geospatial data: {str(e)}", exc_info=True)
             raise
     
     def initialize_cluster(self) -> None:
-        """Initialize the Dask cluster for distributed processing."""
+        """Configure the threaded Dask scheduler for processing."""
         print(f"\n=== Initializing Processing Environment ===")
-        print(f"Workers: {self.n_workers}")
-        print(f"Memory per worker: {self.memory_per_worker}GB")
+        print(f"Threads: {self.n_workers * 2}")
         
-        self.cluster = LocalCluster(
-            n_workers=self.n_workers,
-            threads_per_worker=2,
-            memory_limit=f"{self.memory_per_worker}GB",
-            silence_logs=logging.WARNING
-        )
-        self.client = Client(self.cluster)
-        print(f"Dashboard: {self.client.dashboard_link}")
+        # Arrow CSV parsing, the NumPy kernels and the Parquet writes release the GIL,
+        # so threads share partitions in memory instead of serializing them between
+        # worker processes. Passed to each compute rather than set globally, so the
+        # analysis cluster and importers keep their own scheduler
+        self.scheduler = {'scheduler': 'threads', 'num_workers': self.n_workers * 2}
 
     def encode_categorical_columns(self, ddf):
-        """Encode categorical and boolean columns and process timestamps."""
+        """Encode categorical and boolean columns, process timestamps and add geospatial data."""
         print("\n=== Encoding Columns ===")
-        
-        # Store columns to drop later
-        columns_to_drop = []
+        columns = set(ddf.columns)
         
         # Handle boolean columns
         print("\nEncoding boolean columns...")
         bool_mapping = {'false': 0, 'true': 1, 'False': 0, 'True': 1}
-        for col in self.bool_columns:
-            if col in ddf.columns:
-                print(f"Encoding {col}...")
-                ddf[f'{col}_encoded'] = ddf[col].astype(str).str.lower().map(
-                    bool_mapping,
-                    meta=(f'{col}_encoded', 'int8')
-                )
-                self.encoding_maps[col] = bool_mapping
-                columns_to_drop.append(col)
+        bool_columns = [col for col in self.bool_columns if col in columns]
+        for col in bool_columns:
+            print(f"Encoding {col}...")
+            self.encoding_maps[col] = bool_mapping
         
         # Handle categorical columns
         print("\nEncoding categorical columns...")
-        for col in self.categorical_columns:
-            if col in ddf.columns:
-                print(f"Encoding {col}...")
-                unique_values = ddf[col].unique().compute()
-                mapping = {str(val): idx for idx, val in enumerate(sorted(str(v) for v in unique_values))}
-                self.encoding_maps[col] = mapping
-                
-                ddf[f'{col}_encoded'] = ddf[col].astype(str).map(
-                    mapping,
-                    meta=(f'{col}_encoded', 'int32')
-                )
-                # Don't drop HALTESTELLEN_NAME yet
-                if col != 'HALTESTELLEN_NAME':
-                    columns_to_drop.append(col)
+        categorical_columns = [col for col in self.categorical_columns if col in columns]
+        
+        # Build the global category lists for all columns in a single scan. The frame
+        # is not persisted first, so the CSVs are parsed twice: once here, reading
+        # only the projected columns, and once by the fused encode before the
+        # persist, which then holds the encoded frame rather than raw strings
+        print("Collecting categories...")
+        unique_values = dict(zip(
+            categorical_columns,
+            dask.compute(*[ddf[col].dropna().unique() for col in categorical_columns], **self.scheduler)
+        ))
+        
+        categories = {}
+        for col in categorical_columns:
+            print(f"Encoding {col}...")
+            # Codes follow first appearance in the sorted input files, so the same
+            # files always give the same codes
+            col_categories = pd.Index(unique_values[col].astype(str).to_numpy())
+            self.encoding_maps[col] = {val: idx for idx, val in enumerate(col_categories)}
+            dtype = self._smallest_int_dtype(len(col_categories))
+            self.encoded_dtypes[f'{col}_encoded'] = dtype
+            categories[col] = (pa.array(col_categories, type=pa.string()), dtype)
         
         # Process timestamps
         print("\n=== Processing Timestamps ===")
         timestamp_pairs = [
-            ('ANKUNFTSZEIT', 'AN_PROGNOSE', 'ARRIVAL_TIME_DIFF_SECONDS'),
-            ('ABFAHRTSZEIT', 'AB_PROGNOSE', 'DEPARTURE_TIME_DIFF_SECONDS')
+            (actual_col, pred_col, diff_col)
+            for actual_col, pred_col, diff_col in [
+                ('ANKUNFTSZEIT', 'AN_PROGNOSE', 'ARRIVAL_TIME_DIFF_SECONDS'),
+                ('ABFAHRTSZEIT', 'AB_PROGNOSE', 'DEPARTURE_TIME_DIFF_SECONDS')
+            ]
+            if actual_col in columns and pred_col in columns
         ]
         
-        for actual_col, pred_col, diff_col in timestamp_pairs:
-            if actual_col in ddf.columns and pred_col in ddf.columns:
-                print(f"\nProcessing {actual_col} and {pred_col}...")
-                
-                print(f"Converting timestamps to datetime...")
-                ddf[actual_col] = dd.to_datetime(ddf[actual_col], format='mixed', dayfirst=True)
-                ddf[pred_col] = dd.to_datetime(ddf[pred_col], format='mixed', dayfirst=True)
-                
-                print(f"Calculating {diff_col}...")
-                ddf[diff_col] = (ddf[pred_col] - ddf[actual_col]).dt.total_seconds()
-                
-                print(f"Converting {actual_col} to minutes since midnight...")
-                ddf[f'{actual_col}_MINUTES'] = (ddf[actual_col].dt.hour * 60 + 
-                                              ddf[actual_col].dt.minute).astype('int16')
-                
-                ddf[f'{actual_col}_DAY_OF_WEEK'] = ddf[actual_col].dt.dayofweek.astype('int8')
-                ddf[f'{actual_col}_MONTH'] = ddf[actual_col].dt.month.astype('int8')
-                ddf[f'{actual_col}_IS_WEEKEND'] = (ddf[f'{actual_col}_DAY_OF_WEEK'] >= 5).astype('int8')
-                
-                columns_to_drop.extend([actual_col, pred_col])
+        formats = {
+            col: self.timestamp_formats.get(col)
+            for actual_col, pred_col, _ in timestamp_pairs
+            for col in (actual_col, pred_col)
+        }
         
-        self._save_encodings()
+        # Stations are looked up by their code, so this reuses the category scan above
+        geo_lookup = None
+        if 'HALTESTELLEN_NAME' in categories:
+            geo_lookup = self._build_geospatial_lookup(self.encoding_maps['HALTESTELLEN_NAME'])
         
-        return ddf, columns_to_drop
-    
+        # Encode, derive time features and add coordinates in one pass per partition
+        print("\nTransforming partitions...")
+        args = (bool_columns, categories, timestamp_pairs, formats, geo_lookup, self.sort_columns)
+        meta = self._transform_partition(ddf._meta, *args)
+        ddf = ddf.map_partitions(self._transform_partition, *args, meta=meta)
+        
+        self._save_encodings()
+
+        return ddf
+
+    @staticmethod
+    def _arrow_to_pandas(table):
+        """Convert an Arrow table to pandas, keeping strings Arrow-backed."""
+        return table.to_pandas(types_mapper={pa.string(): pd.StringDtype('pyarrow')}.get)
+
+    @staticmethod
+    def _parse_timestamps(series, fmt):
+        """Parse a partition with Arrow's strptime kernel, falling back to pandas for rejected rows."""
+        if fmt is None:
+            return pd.to_datetime(series, format='mixed', dayfirst=True, errors='coerce')
+
+        values = pa.array(series, type=pa.string(), from_pandas=True)
+        if isinstance(values, pa.ChunkedArray):
+            values = values.combine_chunks()
+        parsed = pc.strptime(values, format=fmt, unit='ns', error_is_null=True)
+        result = pd.Series(parsed.to_numpy(zero_copy_only=False), index=series.index, name=series.name)
+
+        failed = result.isna() & series.notna()
+        if failed.any():
+            result[failed] = pd.to_datetime(series[failed], format='mixed', dayfirst=True, errors='coerce')
+        return result
+
+    @staticmethod
+    def _transform_partition(df, bool_columns, categories, timestamp_pairs, formats, geo_lookup, sort_columns=()):
+        """Build the encoded output columns of one partition, dropping the raw ones."""
+        new_columns = {}
+        for col in bool_columns:
+            new_columns[f'{col}_encoded'] = df[col].isin(TRUE_VALUES).astype('int8')
+
+        for col, (col_categories, dtype) in categories.items():
+            new_columns[f'{col}_encoded'] = DataProcessor._encode_partition(df[col], col_categories, dtype)
+
+        for actual_col, pred_col, diff_col in timestamp_pairs:
+            actual = DataProcessor._parse_timestamps(df[actual_col], formats[actual_col])
+            predicted = DataProcessor._parse_timestamps(df[pred_col], formats[pred_col])
+
+            # Subtract as int64 nanoseconds in place; NaT rows become NaN
+            actual_ns = actual.to_numpy().view('i8')
+            predicted_ns = predicted.to_numpy().view('i8')
+            delta = np.subtract(predicted_ns, actual_ns)
+            np.floor_divide(delta, 1_000_000_000, out=delta)
+            seconds = delta.astype('float64')
+            seconds[(actual_ns == NAT_NS) | (predicted_ns == NAT_NS)] = np.nan
+            new_columns[diff_col] = seconds
+
+            days, minutes, day_of_week, month = DataProcessor._decompose_timestamps(actual_ns)
+            # The date is only kept where it is a sort key; it is not a model feature
+            if f'{actual_col}_DATE' in sort_columns:
+                new_columns[f'{actual_col}_DATE'] = days
+            new_columns[f'{actual_col}_MINUTES'] = minutes
+            new_columns[f'{actual_col}_DAY_OF_WEEK'] = day_of_week
+            new_columns[f'{actual_col}_MONTH'] = month
+            new_columns[f'{actual_col}_IS_WEEKEND'] = (day_of_week >= 5).astype('int8')
+
+        if geo_lookup is not None:
+            station_codes = new_columns['HALTESTELLEN_NAME_encoded'].to_numpy()
+            latitudes, longitudes, geoids = geo_lookup
+            new_columns['STATION_LAT'] = latitudes[station_codes]
+            new_columns['STATION_LON'] = longitudes[station_codes]
+            new_columns['STATION_GEOID'] = geoids[station_codes]
+
+        consumed = set(bool_columns) | set(categories)
+        for actual_col, pred_col, _ in timestamp_pairs:
+            consumed.update((actual_col, pred_col))
+        kept = [col for col in df.columns if col not in consumed]
+
+        return df[kept].assign(**new_columns)
+
+    @staticmethod
+    def _decompose_timestamps(ns):
+        """Derive days since the epoch, minute of day, weekday and month from int64 nanoseconds (NaT -> -1)."""
+        minutes_total = ns // 60_000_000_000
+        days, minutes = np.divmod(minutes_total, 1440)
+        day_of_week = (days + 3) % 7  # 1970-01-01 was a Thursday
+
+        # Month from days since the epoch (civil_from_days, March-based years)
+        z = days + 719468
+        doe = z - (z // 146097) * 146097
+        yoe = (doe - doe // 1460 + doe // 36524 - doe // 146096) // 365
+        doy = doe - (365 * yoe + yoe // 4 - yoe // 100)
+        mp = (5 * doy + 2) // 153
+        month = np.where(mp < 10, mp + 3, mp - 9)
+
+        missing = ns == NAT_NS
+        days[missing] = -1
+        minutes[missing] = -1
+        day_of_week[missing] = -1
+        month[missing] = -1
+        return days.astype('int32'), minutes.astype('int16'), day_of_week.astype('int8'), month.astype('int8')
+
+    @staticmethod
+    def _write_partition(df, output_dir, schema, parquet_options, sort_columns,
+                         row_group_size=None, partition_info=None):
+        """Write one partition as a record batch to its own parquet file and return its row count."""
+        if sort_columns:
+            df = df.sort_values(sort_columns, ignore_index=True)
+        number = partition_info['number'] if partition_info else 0
+        path = os.path.join(output_dir, f'part.{number}.parquet')
+        with pq.ParquetWriter(path, schema, **parquet_options) as writer:
+            writer.write_batch(pa.RecordBatch.from_pandas(df, schema=schema, preserve_index=False),
+                               row_group_size=row_group_size)
+        return pd.Series([len(df)], dtype='int64')
+
+    @staticmethod
+    def _smallest_int_dtype(n_values: int) -> str:
+        """Return the smallest signed integer dtype holding codes 0..n_values-1 and -1."""
+        for dtype in ('int8', 'int16'):
+            if n_values - 1 <= np.iinfo(dtype).max:
+                return dtype
+        return 'int32'
+
+    @staticmethod
+    def _encode_partition(series, categories, dtype='int32'):
+        """Look up the codes of one partition on its Arrow buffer (missing -> -1)."""
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Only the partition's categories are looked up; the extra slot maps code -1
+            lookup = DataProcessor._encode_partition(series.cat.categories.to_series().astype(str), categories)
+            codes = np.append(lookup.to_numpy(), -1)[series.cat.codes.to_numpy()]
+            return pd.Series(codes, index=series.index, name=series.name).astype(dtype)
+
+        # index_in hashes the string buffer directly, so no Python str objects are created
+        values = pa.array(series, type=pa.string(), from_pandas=True)
+        codes = pc.index_in(values, value_set=categories).fill_null(-1)
+        return pd.Series(codes.to_numpy(), index=series.index, name=series.name).astype(dtype)
+
     def _save_encodings(self):
         """Save encoding mappings to files."""
         try:
@@ -1374,9 +1699,10 @@ class DataProcessor:
             if geospatial_file and os.path.exists(geospatial_file):
                 self.load_geospatial_data(geospatial_file)
     
-            # Get files
+            # Get files; sorted because listdir order depends on the filesystem, and the
+            # category codes follow the order in which values are first seen
             data_files = [os.path.join(train_folder, f) 
-                         for f in os.listdir(train_folder) 
+                         for f in sorted(os.listdir(train_folder)) 
                          if f.endswith('.csv')]
     
             if not data_files:
@@ -1399,84 +1725,55 @@ class DataProcessor:
             needed_columns = [col for col in all_columns if col not in exclude_columns]
             print(f"\nColumns to be processed: {', '.join(needed_columns)}")
     
-            # Load data
-            print("\n=== Loading Data ===")
-            ddf = dd.read_csv(
-                data_files,
-                delimiter=delimiter,
-                dtype=self.dtype_definitions,
-                blocksize=f"{chunk_size}MB",
-                assume_missing=True,
-                usecols=needed_columns
-            )
-    
-            # Apply filters
+            # Filters are evaluated on Arrow record batches while reading,
+            # so rejected rows are never converted to pandas
             print("\n=== Applying Filters ===")
+            row_filters = {}
             if train_filters:
                 for column, values in train_filters.items():
-                    if column in ddf.columns:
+                    if column in needed_columns:
                         values = [values] if not isinstance(values, list) else values
                         print(f"Filtering {column} for values: {values}")
-                        ddf = ddf[ddf[column].isin(values)]
-                        ddf = ddf.persist()
+                        row_filters[column] = values
+    
+            # Filter for REAL status; the status columns are not needed afterwards
+            status_columns = ["AN_PROGNOSE_STATUS", "AB_PROGNOSE_STATUS"]
+            if all(col in needed_columns for col in status_columns):
+                print("Filtering for REAL status...")
+                row_filters.update({col: ["REAL"] for col in status_columns})
+            output_columns = [col for col in needed_columns if col not in status_columns]
     
-            # Filter for REAL status
-            print("\nFiltering for REAL status...")
-            if "AN_PROGNOSE_STATUS" in ddf.columns and "AB_PROGNOSE_STATUS" in ddf.columns:
-                ddf = ddf[
-                    (ddf["AN_PROGNOSE_STATUS"] == "REAL") & 
-                    (ddf["AB_PROGNOSE_STATUS"] == "REAL")
-                ]
-                ddf = ddf.drop(columns=["AN_PROGNOSE_STATUS", "AB_PROGNOSE_STATUS"])
-                ddf = ddf.persist()
+            # Load data, one partition per file
+            print("\n=== Loading Data ===")
+            column_types = {col: self.dtype_definitions.get(col, pa.string()) for col in needed_columns}
+            reader = FilteredCSVReader(delimiter, column_types, row_filters, output_columns, chunk_size << 20)
+            ddf = dd.from_map(
+                reader,
+                data_files,
+                meta=self._arrow_to_pandas(pa.schema(list(column_types.items())).empty_table().select(output_columns)),
+                label='read-filtered-csv',
+                enforce_metadata=False
+            )
     
-            # Process and encode - now returns columns to drop
+            # Encode, derive features and drop the raw columns in one fused pass
             print("\n=== Encoding categorical columns ===")
-            ddf, columns_to_drop = self.encode_categorical_columns(ddf)
-        
-            # Add geospatial data before dropping HALTESTELLEN_NAME
-            print("\n=== Adding geospatial information ===")
-            ddf = self._add_geospatial_columns(ddf)
-
-            # Now safe to drop all columns including HALTESTELLEN_NAME
-            print("\nDropping original columns...")
-            if 'HALTESTELLEN_NAME' not in columns_to_drop:
-                columns_to_drop.append('HALTESTELLEN_NAME')
-            ddf = ddf.drop(columns=columns_to_drop)
+            ddf = self.encode_categorical_columns(ddf)
     
             # Save results
             print("\n=== Saving Results ===")
             print("Writing to parquet file...")
     
-            n_partitions = max(1, int(total_size * 2))
-            print(f"Using {n_partitions} partitions for writing")
-    
-            ddf = ddf.repartition(npartitions=n_partitions)
-    
-            # Prepare metadata as strings
-            meta = {
-                'has_geospatial': str(bool(self.geospatial_data)),
-                'processing_date': datetime.now().isoformat(),
-                'original_files': str(len(data_files)),
-                'filters_applied': str(train_filters)
-            }
-
-            # Convert all metadata values to strings
-            meta = {k: str(v) for k, v in meta.items()}
-
             # Ensure all columns have correct dtypes before saving
             dtypes = {
                 'ZUSATZFAHRT_TF_encoded': 'int8',
                 'FAELLT_AUS_TF_encoded': 'int8',
                 'DURCHFAHRT_TF_encoded': 'int8',
-                'LINIEN_ID_encoded': 'int32',
-                'LINIEN_TEXT_encoded': 'int32',
-                'HALTESTELLEN_NAME_encoded': 'int32',
                 'STATION_LAT': 'float64',
                 'STATION_LON': 'float64',
                 'STATION_GEOID': 'int64',
                 'ARRIVAL_TIME_DIFF_SECONDS': 'float64',
                 'DEPARTURE_TIME_DIFF_SECONDS': 'float64',
+                'ANKUNFTSZEIT_DATE': 'int32',
                 'ANKUNFTSZEIT_MINUTES': 'int16',
                 'ABFAHRTSZEIT_MINUTES': 'int16',
                 'ANKUNFTSZEIT_DAY_OF_WEEK': 'int8',
@@ -1484,34 +1781,71 @@ class DataProcessor:
                 'ANKUNFTSZEIT_IS_WEEKEND': 'int8',
                 'ABFAHRTSZEIT_DAY_OF_WEEK': 'int8',
                 'ABFAHRTSZEIT_MONTH': 'int8',
-                'ABFAHRTSZEIT_IS_WEEKEND': 'int8'
+                'ABFAHRTSZEIT_IS_WEEKEND': 'int8',
+                **self.encoded_dtypes
             }
 
             print("\nEnsuring correct data types...")
-            for col, dtype in dtypes.items():
-                if col in ddf.columns:
-                    ddf[col] = ddf[col].astype(dtype)
-
-            print("\nSaving to parquet...")
-            with ProgressBar():
-                ddf.to_parquet(
-                output_file_path,
-                engine='pyarrow',
-                compression='snappy',
-                write_metadata_file=True,
-                write_index=False
-            )
-
-            # Save metadata separately
-            metadata = {
+            ddf = ddf.astype({col: dtype for col, dtype in dtypes.items() if col in ddf.columns})
+    
+            # Size partitions from the encoded rows rather than the raw CSV size,
+            # which overestimates the output once rows are filtered and columns encoded
+            ddf = ddf.persist(**self.scheduler)
+            ddf = ddf.repartition(partition_size="128MiB")
+            # Each partition is encoded and compressed by its own writer on its own
+            # thread, so keep at least one partition per scheduler thread
+            write_threads = self.n_workers * 2
+            if ddf.npartitions < write_threads:
+                ddf = ddf.repartition(npartitions=write_threads)
+            print(f"Using {ddf.npartitions} partitions for writing")
+    
+            # Prepare metadata as strings
+            meta = {
                 'has_geospatial': str(bool(self.geospatial_data)),
                 'processing_date': datetime.now().isoformat(),
                 'original_files': str(len(data_files)),
-                'filters_applied': str(train_filters),
-                'columns': ','.join(ddf.columns),
-                'dtypes': str(ddf.dtypes.to_dict())
+                'filters_applied': str(train_filters)
             }
-    
+
+            # Derive the Arrow schema once from the Dask meta instead of per partition;
+            # it already records the columns and dtypes, so only the run details are added
+            schema = pa.Schema.from_pandas(ddf._meta, preserve_index=False)
+            schema = schema.with_metadata({**(schema.metadata or {}), **meta})
+
+            # Keep the labels next to the codes: the encoded columns stay plain
+            # integers for the models, and each field carries its category list
+            for col in self.categorical_columns:
+                name = f'{col}_encoded'
+                if name in schema.names and col in self.encoding_maps:
+                    labels = sorted(self.encoding_maps[col], key=self.encoding_maps[col].get)
+                    index = schema.get_field_index(name)
+                    field = schema.field(index).with_metadata({'categories': json.dumps(labels)})
+                    schema = schema.set(index, field)
+
+            # Stream each partition into its own file; no global metadata gathering.
+            # Files go to a staging folder that is moved into place once complete,
+            # so an interrupted run never leaves a truncated output behind. A staging
+            # folder left by an interrupted run is replaced here rather than removed
+            # while its writer threads may still be running
+            print("\nSaving to parquet...")
+            staging_path = f"{output_file_path}.partial"
+            shutil.rmtree(staging_path, ignore_errors=True)
+            os.makedirs(staging_path)
+            pq.write_metadata(schema, os.path.join(staging_path, '_common_metadata'))
+            with ProgressBar():
+                rows_written = ddf.map_partitions(
+                    self._write_partition,
+                    staging_path,
+                    schema,
+                    self.parquet_options,
+                    [col for col in self.sort_columns if col in schema.names],
+                    self.row_group_size,
+                    meta=('rows', 'int64')
+                ).sum().compute(**self.scheduler)
+            print(f"Rows written: {rows_written:,}")
+            shutil.rmtree(output_file_path, ignore_errors=True)
+            os.replace(staging_path, output_file_path)
+
             # Verify the saved file
             print("\nVerifying saved file...")
             test_df = dd.read_parquet(output_file_path)
@@ -1538,11 +1872,6 @@ class DataProcessor:
         except Exception as e:
             logging.error(f"Processing error: {str(e)}", exc_info=True)
             return None
-        finally:
-            if self.client:
-                self.client.close()
-            if self.cluster:
-                self.cluster.close()
 
 class DataManager:
     """Manages the overall data processing workflow."""
@@ -1552,6 +1881,7 @@ class DataManager:
         self.train_folder = os.path.join(base_path, "train")
         self.processed_folder = os.path.join(base_path, "processed")
         self.geospatial_folder = os.path.join(base_path, "geospatial")
+        self.processed_output_path = self.output_path(base_path)
         
         # Create necessary directories
         for folder in [self.base_path, self.train_folder, 
@@ -1565,6 +1895,11 @@ class DataManager:
         )
         self.analyzer = None
     
+    @staticmethod
+    def output_path(base_path: str = "data") -> str:
+        """Return the processed parquet path under base_path without creating any folders."""
+        return os.path.join(base_path, "processed", "processed_data.parquet")
+    
     def get_months_to_download(self) -> List[str]:
         months = []
         current_date = datetime.now()
@@ -1590,10 +1925,7 @@ class DataManager:
                     raise Exception("Download failed")
             
             # Process data
-            output_file = os.path.join(
-                self.processed_folder,
-                "processed_data.parquet"
-            )
+            output_file = self.processed_output_path
             
             # Check for geospatial data
             geospatial_file = os.path.join(self.geospatial_folder, "CH.txt")
@@ -1633,13 +1965,46 @@ class DataManager:
             logging.error(f"Processing pipeline error: {str(e)}")
             return None
 
+    @staticmethod
+    def _unlink_missing_ok(path: str) -> None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
     def cleanup(self):
         """Clean up temporary files and folders."""
         try:
-            shutil.rmtree(self.train_folder)
-            os.makedirs(self.train_folder)
-        except Exception as e:
-            logging.warning(f"Cleanup error: {str(e)}")
+            # Remove what this run extracted; otherwise swap in an empty folder
+            paths = self.downloader.extracted_paths
+            if not paths:
+                # The rename is atomic, so nobody sees a half-deleted folder; the tree
+                # walk happens in the background. The thread is not a daemon, so the
+                # interpreter waits for it rather than leaving the trash behind
+                trash = f"{self.train_folder}.trash-{os.getpid()}-{time.time_ns()}"
+                os.replace(self.train_folder, trash)
+                os.makedirs(self.train_folder)
+                threading.Thread(target=shutil.rmtree, args=(trash, True)).start()
+                return
+            
+            # Unlinks release the GIL, so a small pool keeps several in flight at once
+            train_root = os.path.realpath(self.train_folder)
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(16, len(paths))) as executor:
+                list(executor.map(self._unlink_missing_ok, paths))
+            folders = {os.path.dirname(path) for path in paths}
+            paths.clear()
+            
+            # Drop folders the archives created once they are empty, deepest first
+            for folder in sorted(folders, key=len, reverse=True):
+                while folder != train_root and os.path.commonpath([folder, train_root]) == train_root:
+                    with os.scandir(folder) as entries:
+                        if next(entries, None) is not None:
+                            break
+                    os.rmdir(folder)
+                    folder = os.path.dirname(folder)
+        except OSError as e:
+            # Covers FileNotFoundError and PermissionError; anything else is a bug
+            logging.warning("Cleanup error: %s", e)
 
 def main():
     """Main execution function."""
@@ -1652,14 +2017,41 @@ def main():
                       help='Skip preprocessing and use existing parquet file')
     parser.add_argument('--skip-analysis', action='store_true',
                       help='Skip delay analysis')
+    parser.add_argument('--compression', choices=['none', 'snappy', 'zstd', 'gzip'], default='zstd',
+                      help='Parquet compression codec (default: zstd)')
     args = parser.parse_args()
     
     try:
-        manager = DataManager()
+        with contextlib.ExitStack() as stack:
+            valid = False
+            if args.skip_preprocessing:
+                static_output_file = DataManager.output_path()
+                # One stat both checks existence and rules out a truncated single file,
+                # which needs at least the two magic markers and the footer length.
+                # A folder needs at least one part file
+                try:
+                    st = os.stat(static_output_file)
+                    if stat.S_ISDIR(st.st_mode):
+                        with os.scandir(static_output_file) as entries:
+                            valid = any(entry.name.endswith('.parquet') and entry.is_file()
+                                        for entry in entries)
+                    else:
+                        valid = st.st_size > 12
+                except FileNotFoundError:
+                    pass
+                if not valid:
+                    print("No existing processed file found. Proceeding with preprocessing...")
+            
+            # Discover the dataset in the background while the manager is set up and
+            # the encodings load
+            if valid and not args.skip_analysis:
+                pool = stack.enter_context(concurrent.futures.ThreadPoolExecutor(max_workers=1))
+                prefetch = pool.submit(DelayAnalyzer.open_dataset, static_output_file)
+            
+            manager = DataManager()
+            manager.processor.set_compression(args.compression)
         
-        if args.skip_preprocessing:
-            static_output_file = os.path.join(manager.processed_folder, "processed_data.parquet")
-            if os.path.exists(static_output_file):
+            if valid:
                 print(f"\nUsing existing processed file: {static_output_file}")
                 
                 if not args.skip_analysis:
@@ -1672,7 +2064,7 @@ def main():
                     except Exception as e:
                         print(f"Warning: Could not load encoding maps: {str(e)}")
                         encoding_maps = {}
-                    
+                
                     # Initialize analyzer with encoding maps
                     manager.analyzer = DelayAnalyzer(
                         manager.processed_folder,
@@ -1680,29 +2072,31 @@ def main():
                         n_workers=CONFIG['process_workers'],
                         memory_per_worker=CONFIG['memory_per_worker']
                     )
-                    manager.analyzer.analyze_delays(static_output_file)
-                return
+                    manager.analyzer.analyze_delays(prefetch.result())
             else:
-                print("No existing processed file found. Proceeding with preprocessing...")
-        
-        result = manager.process_all(
-            force_download=args.force_download,
-            skip_analysis=args.skip_analysis
-        )
-        
-        if result:
-            print(f"\nProcessing completed successfully")
-            print(f"Output file: {result}")
-        else:
-            print("\nProcessing failed")
-        
-        if args.cleanup:
-            manager.cleanup()
+                result = manager.process_all(
+                    force_download=args.force_download,
+                    skip_analysis=args.skip_analysis
+                )
+            
+                # Emit the summary in one write
+                if result:
+                    summary = f"\nProcessing completed successfully\nOutput file: {result}\n"
+                else:
+                    summary = "\nProcessing failed\n"
+                sys.stdout.write(summary)
+                sys.stdout.flush()
+                
+                # Only after a processing run: an interrupted or reused run keeps its
+                # downloads, since cleanup drops the whole train folder when this run
+                # extracted nothing
+                if args.cleanup:
+                    manager.cleanup()
             
     except KeyboardInterrupt:
         print("\nOperation cancelled by user")
     except Exception as e:
-        logging.error(f"Unexpected error: {str(e)}", exc_info=True)
+        logging.error("Unexpected error: %s", e, exc_info=True)
         raise
 
 if __name__ == "__main__":